@@ -1,4 +1,6 @@
 # analysis/config.py
+import math
+from types import MappingProxyType
 from flask.json.provider import DefaultJSONProvider
 from ezdxf.math import Vec2
 
@@ -9,8 +11,15 @@ CONFIG = {
     'SNAP_TOLERANCE': 0.20,
     'WALL_HEIGHT': 3.0,
     'LINTEL_BEARING': 0.15,
+    'LINTEL_DEPTH': 0.15,
     'DOOR_HEIGHT': 2.1,
     'WINDOW_HEIGHT': 1.5,
+    'VENTILATOR_HEIGHT': 0.6,
+    'DOOR_WIDTH': 0.9,
+    'WINDOW_WIDTH': 1.2,
+    'VENTILATOR_WIDTH': 0.6,
+    'OPENING_SEARCH_RADIUS': 0.5,
+    'EXTERNAL_WALL_THRESHOLD': 0.20,
     'LAYERS': {
         'WALL': ['WALL'],
         'ROOM': ['ROOM_AREA', 'SITOUT', 'VARANDAH', 'PORCH'],
@@ -21,6 +30,44 @@ CONFIG = {
     }
 }
 
+# Unit rates: masonry/lintel per m³, plaster/openings per m²
+RATE_TABLES = {
+    'default': {
+        'masonry': 6500.0,
+        'plaster': 350.0,
+        'lintel': 9000.0,
+        'door': 4500.0,
+        'window': 5000.0,
+        'ventilator': 3500.0
+    }
+}
+
+# Numeric keys that may be overridden per request / per sweep point.
+# LAYERS is excluded: entities are bucketed by layer once, at parse time.
+TUNABLE_KEYS = tuple(k for k, v in CONFIG.items() if isinstance(v, (int, float)))
+
+
+def make_config(overrides=None):
+    """Return a read-only copy of CONFIG with `overrides` applied.
+
+    The module-level CONFIG is never touched, so configs built here are
+    safe to hand to concurrent requests or worker processes.
+    """
+    cfg = dict(CONFIG)
+    for key, val in (overrides or {}).items():
+        if key not in TUNABLE_KEYS:
+            raise ValueError(f"Unknown or non-tunable config key: {key}")
+        try:
+            cfg[key] = float(val)
+        except (TypeError, ValueError):
+            raise ValueError(f"Config value for {key} must be a number, got {val!r}")
+        if not math.isfinite(cfg[key]):
+            raise ValueError(f"Config value for {key} must be finite, got {val!r}")
+
+    cfg['LAYERS'] = MappingProxyType({k: tuple(v) for k, v in CONFIG['LAYERS'].items()})
+    return MappingProxyType(cfg)
+
+
 class CustomJSONProvider(DefaultJSONProvider):
     def default(self, obj):
         if isinstance(obj, Vec2):
@@ -0,0 +1,145 @@
+# analysis/costing.py
+from functools import lru_cache
+import numpy as np
+from .config import CONFIG, RATE_TABLES, TUNABLE_KEYS
+
+RATE_ITEMS = ('masonry', 'plaster', 'lintel', 'door', 'window', 'ventilator')
+OPENING_TYPES = (('doors', 'DOOR'), ('windows', 'WINDOW'), ('ventilators', 'VENTILATOR'))
+MAX_SCENARIOS = 5000
+
+# Where these quantities differ from the browser BOQ (BOQEditable.jsx)
+FORMULA_NOTES = [
+    "Masonry uses the measured wall plan area (sum of wall length x thickness), "
+    "not total wall length x a single 0.23 m thickness.",
+    "Opening and lintel deductions use the measured average wall thickness.",
+    "Masonry also deducts lintel volume: (opening width + 2 x LINTEL_BEARING) "
+    "x thickness x LINTEL_DEPTH per opening; the UI does not model lintels.",
+    "Plaster matches the UI: room perimeter x WALL_HEIGHT less opening area, plus carpet (ceiling) area.",
+]
+
+
+@lru_cache(maxsize=32)
+def rate_vector(name):
+    # Cached per table name; RATE_TABLES is treated as read-only after startup
+    if name not in RATE_TABLES:
+        raise ValueError(f"Unknown rate table: {name}")
+    table = RATE_TABLES[name]
+    vec = np.array([float(table[item]) for item in RATE_ITEMS])
+    vec.flags.writeable = False
+    return vec
+
+
+def _build_rates(scenarios):
+    rows = []
+    for sc in scenarios:
+        rates = sc.get('rates', 'default')
+        if isinstance(rates, str):
+            rows.append(rate_vector(rates))
+            continue
+
+        # Inline dict: per-item overrides on top of a named table
+        row = rate_vector(rates.get('table', 'default')).copy()
+        for item, val in rates.items():
+            if item == 'table':
+                continue
+            if item not in RATE_ITEMS:
+                raise ValueError(f"Unknown rate item: {item}")
+            try:
+                row[RATE_ITEMS.index(item)] = float(val)
+            except (TypeError, ValueError):
+                raise ValueError(f"Rate for {item} must be a number, got {val!r}")
+        if not (np.isfinite(row).all() and (row >= 0).all()):
+            raise ValueError("Rates must be finite and non-negative")
+        rows.append(row)
+
+    return np.vstack(rows)
+
+
+def _build_params(scenarios):
+    overrides = [sc.get('params') or {} for sc in scenarios]
+    for o in overrides:
+        for key in o:
+            if key not in TUNABLE_KEYS:
+                raise ValueError(f"Unknown or non-tunable config key: {key}")
+
+    p = {key: np.array([float(o.get(key, CONFIG[key])) for o in overrides]) for key in TUNABLE_KEYS}
+    for key, arr in p.items():
+        # Negative heights/widths would otherwise be hidden by the np.maximum(0, ...) clamps
+        if not (np.isfinite(arr).all() and (arr >= 0).all()):
+            raise ValueError(f"Config values for {key} must be finite and non-negative")
+    return p, overrides
+
+
+def cost_arrays(result, scenarios):
+    """Cost one analyze_strict result under many scenarios at once.
+
+    Each scenario is {'params': {CONFIG overrides}, 'rates': table name or
+    {item: rate, 'table': base name}}. Returns (quantities, costs), both of
+    shape (n_scenarios, len(RATE_ITEMS)).
+
+    Opening spans are count x width per type. The width is the scenario's
+    DOOR/WINDOW/VENTILATOR_WIDTH when given, else the measured average from
+    opening_widths, else the CONFIG default.
+
+    This is not the same formula as BOQEditable.jsx; see FORMULA_NOTES.
+    """
+    if not scenarios:
+        raise ValueError("No scenarios given")
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f"{len(scenarios)} scenarios given (max {MAX_SCENARIOS})")
+
+    p, overrides = _build_params(scenarios)
+    rates = _build_rates(scenarios)
+
+    boq = result.get('boq', {})
+    counts = result.get('counts', {})
+    widths = result.get('opening_widths') or {}
+
+    wall_len = boq.get('total_wall_length', 0)
+    plan_area = boq.get('wall_plan_area', wall_len * 0.23)
+    thickness = plan_area / wall_len if wall_len else 0.23
+
+    # (S, 3) opening counts, widths and heights: doors, windows, ventilators
+    n = np.array([counts.get(k, 0) for k, _ in OPENING_TYPES], dtype=float)
+    measured = np.array([
+        widths[k] / counts[k] if widths.get(k) and counts.get(k) else CONFIG[f'{T}_WIDTH']
+        for k, T in OPENING_TYPES
+    ])
+    given = np.array([[f'{T}_WIDTH' in o for _, T in OPENING_TYPES] for o in overrides])
+    width = np.where(given, np.column_stack([p[f'{T}_WIDTH'] for _, T in OPENING_TYPES]), measured)
+    height = np.column_stack([p[f'{T}_HEIGHT'] for _, T in OPENING_TYPES])
+
+    span = n * width
+    opening_area = span * height
+    total_opening_area = opening_area.sum(axis=1)
+
+    # Lintel over every opening, bearing into the wall on both sides
+    lintel_len = span.sum(axis=1) + 2 * p['LINTEL_BEARING'] * n.sum()
+    lintel_vol = lintel_len * thickness * p['LINTEL_DEPTH']
+
+    gross_masonry = plan_area * p['WALL_HEIGHT']
+    net_masonry = np.maximum(0, gross_masonry - total_opening_area * thickness - lintel_vol)
+
+    # Same as the UI: room-side wall plaster less openings, plus ceiling
+    wall_plaster = np.maximum(0, boq.get('room_perimeter', 0) * p['WALL_HEIGHT'] - total_opening_area)
+    plaster = wall_plaster + boq.get('carpet_area', 0)
+
+    quantities = np.column_stack([net_masonry, plaster, lintel_vol, opening_area])
+    return quantities, quantities * rates
+
+
+def cost_scenarios(result, scenarios):
+    quantities, costs = cost_arrays(result, scenarios)
+    totals = costs.sum(axis=1).round(2).tolist()
+    q_rows = quantities.round(3).tolist()
+    c_rows = costs.round(2).tolist()
+
+    return [
+        {
+            'scenario': sc,
+            'quantities': dict(zip(RATE_ITEMS, q)),
+            'costs': dict(zip(RATE_ITEMS, c)),
+            'total': t
+        }
+        for sc, q, c, t in zip(scenarios, q_rows, c_rows, totals)
+    ]
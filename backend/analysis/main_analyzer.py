@@ -1,13 +1,34 @@
 # analysis/main_analyzer.py
 from ezdxf.math import Vec2
+from .config import CONFIG
 from .plinth_extractor import extract_plinth
 from .room_extractor import extract_rooms
-from .wall_opening_extractor import extract_walls, extract_openings, map_walls_to_rooms
+from .wall_opening_extractor import collect_wall_segments, pair_walls, collect_openings, match_openings, map_walls_to_rooms
 
-def analyze_strict(doc, scale):
+def analyze_strict(doc, scale, config=CONFIG):
+    return evaluate_drawing(prepare_drawing(doc, scale, config), config)
+
+
+def prepare_drawing(doc, scale, config=CONFIG):
+    """Parse the DXF once and bucket everything that does not depend on
+    the numeric tunables. The result is plain data (picklable) and is never
+    mutated by evaluate_drawing, so it can be reused for any number of configs.
+    """
     msp = doc.modelspace()
 
     # 1. Extract Texts
+    texts = extract_texts(msp, scale)
+
+    # 2. Extract Geometry
+    return {
+        'slab_area': extract_plinth(msp, scale, config),
+        'rooms': extract_rooms(msp, scale, texts, config), # <-- Now returns exact 'perimeter'
+        'wall_segments': collect_wall_segments(msp, scale, config),
+        'opening_candidates': collect_openings(msp, scale, config)
+    }
+
+
+def extract_texts(msp, scale):
     texts = []
     for e in msp.query('TEXT MTEXT'):
         val = e.dxf.text if e.dxftype() == 'TEXT' else e.text
@@ -15,22 +36,25 @@ def analyze_strict(doc, scale):
         val = (val or "").strip().upper()
         if val:
             texts.append({'val': val, 'pos': pos})
+    return texts
 
-    # 2. Extract Geometry
-    slab_area = extract_plinth(msp, scale)
-    rooms = extract_rooms(msp, scale, texts) # <-- Now returns exact 'perimeter'
-    walls = extract_walls(msp, scale)
+
+def evaluate_drawing(prepared, config=CONFIG):
+    slab_area = prepared['slab_area']
+    # Fresh room dicts: openings get attached per evaluation
+    rooms = [dict(r, attached_openings=[]) for r in prepared['rooms']]
+    walls = pair_walls(prepared['wall_segments'], config)
 
     # 3. Attach walls ↔ rooms
     map_walls_to_rooms(walls, rooms)
 
     # 4. Extract openings
-    openings = extract_openings(msp, scale, walls, rooms)
+    openings = match_openings(prepared['opening_candidates'], walls, rooms, config)
 
     # 5. Wall Length Split Logic
     ext_wall_len = 0.0
     int_wall_len = 0.0
-    EXTERNAL_THRESHOLD = 0.20 
+    EXTERNAL_THRESHOLD = config['EXTERNAL_WALL_THRESHOLD']
 
     for w in walls:
         thickness = w.get('thickness', 0.23) 
@@ -42,6 +66,7 @@ def analyze_strict(doc, scale):
             int_wall_len += length
 
     total_wall_len = ext_wall_len + int_wall_len
+    wall_plan_area = sum(w.get('len', 0) * w.get('thickness', 0.23) for w in walls)
 
     # 6. Room Aggregation
     formatted_rooms = []
@@ -66,6 +91,12 @@ def analyze_strict(doc, scale):
         'ventilators': len([o for o in openings if o['type'] == 'ventilator'])
     }
 
+    opening_widths = {
+        'doors': round(sum(o['width'] for o in openings if o['type'] == 'door'), 2),
+        'windows': round(sum(o['width'] for o in openings if o['type'] == 'window'), 2),
+        'ventilators': round(sum(o['width'] for o in openings if o['type'] == 'ventilator'), 2)
+    }
+
     return {
         "status": "success",
         "boq": {
@@ -74,9 +105,11 @@ def analyze_strict(doc, scale):
             "total_wall_length": round(total_wall_len, 2),
             "external_wall_length": round(ext_wall_len, 2),
             "internal_wall_length": round(int_wall_len, 2),
+            "wall_plan_area": round(wall_plan_area, 3),
             "room_perimeter": round(total_room_perimeter, 2) # <-- Exact Sum
         },
         "counts": counts,
+        "opening_widths": opening_widths,
         "rooms": formatted_rooms,
         "walls_raw": len(walls)
     }
\ No newline at end of file
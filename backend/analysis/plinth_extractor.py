@@ -2,9 +2,9 @@
 from .geometry import get_vec2_list
 from .config import CONFIG
 
-def extract_plinth(msp, scale):
+def extract_plinth(msp, scale, config=CONFIG):
     for e in msp.query('LWPOLYLINE POLYLINE'):
-        if e.dxf.layer.upper() in CONFIG['LAYERS']['PLINTH'] and getattr(e, 'is_closed', False):
+        if e.dxf.layer.upper() in config['LAYERS']['PLINTH'] and getattr(e, 'is_closed', False):
             pts = get_vec2_list(e, scale)
             a = 0
             for i in range(len(pts)):
@@ -3,11 +3,11 @@ from .geometry import get_vec2_list, is_point_in_poly, rotating_calipers_bbox
 from .config import CONFIG
 import uuid
 
-def extract_rooms(msp, scale, texts):
+def extract_rooms(msp, scale, texts, config=CONFIG):
     rooms = []
 
     for e in msp.query('LWPOLYLINE POLYLINE'):
-        if e.dxf.layer.upper() not in CONFIG['LAYERS']['ROOM']:
+        if e.dxf.layer.upper() not in config['LAYERS']['ROOM']:
             continue
         if not getattr(e, 'is_closed', False):
             continue
@@ -0,0 +1,78 @@
+# analysis/sweep.py
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from .config import make_config
+from .main_analyzer import prepare_drawing, evaluate_drawing
+
+MAX_SWEEP_POINTS = 500
+# Below this, process start-up costs more than evaluating the points inline
+MIN_PARALLEL_POINTS = 16
+
+_worker_prepared = None
+
+
+def expand_grid(grid):
+    """Accept either a list of override dicts, or a dict of key -> list of
+    values (expanded as a cartesian product). Returns a list of override dicts."""
+    if isinstance(grid, dict):
+        keys = list(grid.keys())
+        values = [v if isinstance(v, (list, tuple)) else [v] for v in grid.values()]
+        # Size check before expanding: the product grows exponentially with the keys
+        size = math.prod(len(v) for v in values)
+        if size > MAX_SWEEP_POINTS:
+            raise ValueError(f"Sweep grid has {size} points (max {MAX_SWEEP_POINTS})")
+        points = [dict(zip(keys, combo)) for combo in product(*values)]
+    elif isinstance(grid, (list, tuple)):
+        if not all(isinstance(p, dict) for p in grid):
+            raise ValueError("Every sweep grid point must be a dict of overrides")
+        points = [dict(p) for p in grid]
+    else:
+        raise ValueError("Sweep grid must be a dict of lists or a list of dicts")
+
+    if not points:
+        raise ValueError("Sweep grid is empty")
+    if len(points) > MAX_SWEEP_POINTS:
+        raise ValueError(f"Sweep grid has {len(points)} points (max {MAX_SWEEP_POINTS})")
+
+    # Fail fast on bad keys/values before any work is scheduled
+    for p in points:
+        make_config(p)
+
+    return points
+
+
+def _init_worker(prepared):
+    global _worker_prepared
+    _worker_prepared = prepared
+
+
+def _evaluate_point(overrides, prepared=None):
+    result = evaluate_drawing(prepared or _worker_prepared, make_config(overrides))
+    return {
+        'params': overrides,
+        'boq': result['boq'],
+        'counts': result['counts'],
+        'opening_widths': result['opening_widths'],
+        'walls_raw': result['walls_raw']
+    }
+
+
+def sweep_parameters(doc, scale, grid, max_workers=None):
+    points = expand_grid(grid)
+
+    # Parse + bucket entities once; only pairing/matching runs per point
+    prepared = prepare_drawing(doc, scale)
+
+    if len(points) < MIN_PARALLEL_POINTS or max_workers == 1:
+        return [_evaluate_point(p, prepared) for p in points]
+
+    workers = min(max_workers or os.cpu_count() or 1, len(points) // MIN_PARALLEL_POINTS)
+    # Each point is ~1 ms of work: hand workers a few large chunks, not one point per message
+    chunksize = -(-len(points) // (workers * 4))
+
+    # The prepared drawing is shipped to each worker once, not once per point
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(prepared,)) as pool:
+        return list(pool.map(_evaluate_point, points, chunksize=chunksize))
@@ -4,29 +4,38 @@ from .config import CONFIG
 from ezdxf.math import Vec2
 import uuid
 
-def extract_walls(msp, scale):
+def collect_wall_segments(msp, scale, config=CONFIG):
     raw_segments = []
 
     # 1. Collect all potential wall lines
     for e in msp.query('LINE LWPOLYLINE POLYLINE'):
-        if e.dxf.layer.upper() in CONFIG['LAYERS']['WALL']:
+        if e.dxf.layer.upper() in config['LAYERS']['WALL']:
             raw_segments.extend(get_segments(e, scale))
 
     enriched = []
     for s in raw_segments:
         vec = s['end'] - s['start']
-        # Filter out tiny noise lines
-        if vec.magnitude < CONFIG['MERGE_GAP']:
+        if vec.magnitude == 0:
             continue
         enriched.append({
             's': s['start'],
             'e': s['end'],
             'u': vec.normalize(),
             'len': vec.magnitude,
-            'mid': s['start'].lerp(s['end'], 0.5),
-            'used': False
+            'mid': s['start'].lerp(s['end'], 0.5)
         })
 
+    return enriched
+
+
+def extract_walls(msp, scale, config=CONFIG):
+    return pair_walls(collect_wall_segments(msp, scale, config), config)
+
+
+def pair_walls(segments, config=CONFIG):
+    # Filter out tiny noise lines (copies, so `segments` can be re-paired)
+    enriched = [dict(s, used=False) for s in segments if s['len'] >= config['MERGE_GAP']]
+
     walls = []
     
     # 2. Pair parallel lines to find Wall Centerlines & Thickness
@@ -50,7 +59,7 @@ def extract_walls(msp, scale):
             dist = dist_point_to_segment(w2['mid'], w1['s'], w1['e'])
             
             # Valid Wall Thickness Check (e.g., 0.1m to 0.4m)
-            if CONFIG['WALL_THICKNESS_MIN'] <= dist <= CONFIG['WALL_THICKNESS_MAX']:
+            if config['WALL_THICKNESS_MIN'] <= dist <= config['WALL_THICKNESS_MAX']:
                 if dist < best_dist:
                     best_dist = dist
                     best = w2
@@ -115,17 +124,17 @@ def map_walls_to_rooms(walls, rooms):
     return walls
 
 
-def extract_openings(msp, scale, walls, rooms):
-    openings = []
+def collect_openings(msp, scale, config=CONFIG):
+    candidates = []
 
     for e in msp.query('LINE LWPOLYLINE POLYLINE ARC CIRCLE'):
         layer = e.dxf.layer.upper()
         o_type = None
         
         # Check Layers from CONFIG
-        if any(L in layer for L in CONFIG['LAYERS']['DOOR']):
+        if any(L in layer for L in config['LAYERS']['DOOR']):
             o_type = 'door'
-        elif any(L in layer for L in CONFIG['LAYERS']['WINDOW']):
+        elif any(L in layer for L in config['LAYERS']['WINDOW']):
             o_type = 'window'
 
         if not o_type:
@@ -164,7 +173,22 @@ def extract_openings(msp, scale, walls, rooms):
              width = e.dxf.radius * scale
         
         if not center: continue
-        
+
+        candidates.append({'type': o_type, 'center': center, 'width': width})
+
+    return candidates
+
+
+def extract_openings(msp, scale, walls, rooms, config=CONFIG):
+    return match_openings(collect_openings(msp, scale, config), walls, rooms, config)
+
+
+def match_openings(candidates, walls, rooms, config=CONFIG):
+    openings = []
+
+    for c in candidates:
+        o_type, center, width = c['type'], c['center'], c['width']
+
         # 2. Match Opening to Closest Wall
         best_w = None
         min_d = float('inf')
@@ -174,7 +198,7 @@ def extract_openings(msp, scale, walls, rooms):
             d = dist_point_to_segment(center, w['start'], w['end'])
             
             # Tolerance: Distance must be close to wall thickness
-            if d < 0.5 and d < min_d: # 0.5m search radius
+            if d < config['OPENING_SEARCH_RADIUS'] and d < min_d:
                 min_d = d
                 best_w = w
 
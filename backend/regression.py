@@ -0,0 +1,458 @@
+"""Golden-corpus regression and performance-budget runner.
+
+    python regression.py                    # compare against goldens + budgets
+    python regression.py --record           # re-record goldens (analysis + costs) only
+    python regression.py --record-budgets   # re-record budgets for this machine only
+
+The corpus is every *.dxf in corpus/ plus the generated plans below (written to
+a temp DXF and read back, so every case goes through ezdxf.readfile). Goldens
+are committed; budgets.json is machine-specific, so record it locally.
+
+Each case also checks that sweep_parameters agrees with analyze_strict run
+per config, on both the in-process and the process-pool path, and that the
+costing engine gives the same rows batched as one scenario at a time. Costs
+for COST_SCENARIOS are kept as goldens in cost_goldens.json.
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import ezdxf
+import numpy as np
+
+from analysis.config import make_config
+from analysis.costing import cost_arrays, cost_scenarios
+from analysis.main_analyzer import analyze_strict, extract_texts
+from analysis.sweep import sweep_parameters
+from analysis.plinth_extractor import extract_plinth
+from analysis.room_extractor import extract_rooms
+from analysis.wall_opening_extractor import collect_wall_segments, collect_openings, pair_walls, map_walls_to_rooms, match_openings
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+GOLDEN_PATH = os.path.join(CORPUS_DIR, "goldens.json")
+COST_GOLDEN_PATH = os.path.join(CORPUS_DIR, "cost_goldens.json")
+BUDGET_PATH = os.path.join(CORPUS_DIR, "budgets.json")
+
+ABS_TOL = 0.011          # outputs are deterministic and rounded to 2 dp: allow one rounding flip
+TIME_THRESHOLD = 1.25    # fail if a stage gets >25% slower ...
+TIME_FLOOR = 0.0005      # ... and by more than 0.5 ms (ignore timer noise)
+STAGE_TIME_FLOORS = {'readfile': 0.002}
+MEM_THRESHOLD = 1.25
+MEM_FLOOR = 64 * 1024
+REPEATS = 5
+PERF_RETRIES = 2     # re-sample a failing case before reporting it
+BUDGET_SAMPLES = 3   # budgets are the median of this many measurements
+
+# name -> (cols, rows, unit scale, generate_plan options)
+GENERATED_PLANS = {
+    'gen_1x1_m': (1, 1, 1.0, {}),
+    'gen_3x2_m': (3, 2, 1.0, {}),
+    'gen_4x4_mm': (4, 4, 0.001, {}),
+    # Rooms on wall centrelines: walls map to rooms, openings attach, TOILET window -> ventilator
+    'gen_3x3_centreline_m': (3, 3, 1.0, {'split': True, 'centreline': True}),
+    # Large enough that pair_walls / map_walls_to_rooms / match_openings take tens of ms
+    'gen_12x12_split_m': (12, 12, 1.0, {'split': True}),
+}
+
+
+def generate_plan(cols, rows, scale=1.0, room=4.0, ext=0.23, inner=0.115, split=False, centreline=False):
+    """Deterministic grid plan: double-line walls, ROOM_AREA polylines with
+    names, doors on internal walls and windows on external ones.
+    Coordinates are written in drawing units (metres / scale).
+
+    split: draw wall faces per room bay (one wall per bay) instead of full
+    length, with a door on every internal bay and a window on every top bay.
+    centreline: draw room polylines to the wall centrelines instead of the
+    inner faces, so analyze_strict maps walls to rooms.
+    """
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    u = 1.0 / scale
+
+    def line(a, b, layer):
+        msp.add_line((a[0] * u, a[1] * u), (b[0] * u, b[1] * u), dxfattribs={'layer': layer})
+
+    def rect(x0, y0, x1, y1, layer):
+        pts = [(x0 * u, y0 * u), (x1 * u, y0 * u), (x1 * u, y1 * u), (x0 * u, y1 * u)]
+        msp.add_lwpolyline(pts, close=True, dxfattribs={'layer': layer})
+
+    W, H = cols * room, rows * room
+
+    # Clear span of bay i between walls (inner faces)
+    def bay(i, n):
+        return i * room + (ext if i == 0 else inner), (i + 1) * room - (ext if i == n - 1 else 0)
+
+    # Centreline of grid line k (0 and n are the external walls)
+    def centre(k, n):
+        return ext / 2 if k == 0 else n * room - ext / 2 if k == n else k * room + inner / 2
+
+    if split:
+        for c in range(cols):
+            xa, xb = bay(c, cols)
+            for y in (0, ext, H - ext, H):
+                line((xa, y), (xb, y), 'WALL')
+        for r in range(rows):
+            ya, yb = bay(r, rows)
+            for x in (0, ext, W - ext, W):
+                line((x, ya), (x, yb), 'WALL')
+        for c in range(1, cols):
+            for r in range(rows):
+                ya, yb = bay(r, rows)
+                line((c * room, ya), (c * room, yb), 'WALL')
+                line((c * room + inner, ya), (c * room + inner, yb), 'WALL')
+        for r in range(1, rows):
+            for c in range(cols):
+                xa, xb = bay(c, cols)
+                line((xa, r * room), (xb, r * room), 'WALL')
+                line((xa, r * room + inner), (xb, r * room + inner), 'WALL')
+    else:
+        # External walls (outer + inner face)
+        for d in (0, ext):
+            line((d, d), (W - d, d), 'WALL')
+            line((W - d, d), (W - d, H - d), 'WALL')
+            line((W - d, H - d), (d, H - d), 'WALL')
+            line((d, H - d), (d, d), 'WALL')
+
+        # Internal walls on the grid lines
+        for c in range(1, cols):
+            x = c * room
+            line((x, ext), (x, H - ext), 'WALL')
+            line((x + inner, ext), (x + inner, H - ext), 'WALL')
+        for r in range(1, rows):
+            y = r * room
+            line((ext, y), (W - ext, y), 'WALL')
+            line((ext, y + inner), (W - ext, y + inner), 'WALL')
+
+    rect(0, 0, W, H, 'PLINTH_AREA')
+
+    names = ['BEDROOM', 'KITCHEN', 'TOILET', 'HALL', 'DINING', 'STORE']
+    for c in range(cols):
+        for r in range(rows):
+            if centreline:
+                x0, x1 = centre(c, cols), centre(c + 1, cols)
+                y0, y1 = centre(r, rows), centre(r + 1, rows)
+            else:
+                x0, x1 = bay(c, cols)
+                y0, y1 = bay(r, rows)
+            rect(x0, y0, x1, y1, 'ROOM_AREA')
+            name = names[(c * rows + r) % len(names)]
+            msp.add_text(name, dxfattribs={'insert': (((x0 + x1) / 2) * u, ((y0 + y1) / 2) * u), 'layer': 'TEXT'})
+
+    # Openings sit on the wall's pairing axis (mid-points of its two faces)
+    if split:
+        for c in range(1, cols):
+            for r in range(rows):
+                ym = sum(bay(r, rows)) / 2
+                line((c * room + inner / 2, ym - 0.45), (c * room + inner / 2, ym + 0.45), 'DOOR')
+        for r in range(1, rows):
+            for c in range(cols):
+                xm = sum(bay(c, cols)) / 2
+                line((xm - 0.45, r * room + inner / 2), (xm + 0.45, r * room + inner / 2), 'DOOR')
+        for c in range(cols):
+            xm = sum(bay(c, cols)) / 2
+            line((xm - 0.6, H - ext / 2), (xm + 0.6, H - ext / 2), 'WINDOW')
+    else:
+        for c in range(1, cols):
+            x = c * room + inner / 2
+            line((x, H / 2 - 0.45), (x, H / 2 + 0.45), 'DOOR')
+        for r in range(1, rows):
+            y = r * room + inner / 2
+            line((W / 2 - 0.45, y), (W / 2 + 0.45, y), 'DOOR')
+        line((W - ext / 2, H / 2 - 0.6), (W - ext / 2, H / 2 + 0.6), 'WINDOW')
+        line((ext / 2, H / 2 - 0.3), (ext / 2, H / 2 + 0.3), 'WINDOW')
+
+    return doc
+
+
+def load_corpus(tmp_dir, only=None):
+    """Return {name: (dxf_path, scale)}; generated plans are written to tmp_dir."""
+    cases = {}
+    if os.path.isdir(CORPUS_DIR):
+        for fn in sorted(os.listdir(CORPUS_DIR)):
+            if fn.lower().endswith('.dxf'):
+                # Stored fixtures are expected in metres unless named *_mm.dxf
+                scale = 0.001 if fn.lower().endswith('_mm.dxf') else 1.0
+                cases[fn[:-4]] = (os.path.join(CORPUS_DIR, fn), scale)
+
+    for name, (cols, rows, scale, opts) in GENERATED_PLANS.items():
+        if only and only not in name:
+            continue
+        path = os.path.join(tmp_dir, f"{name}.dxf")
+        generate_plan(cols, rows, scale, **opts).saveas(path)
+        cases[name] = (path, scale)
+
+    return {k: v for k, v in cases.items() if not only or only in k}
+
+
+def run_stages(path, scale):
+    """The analyze_strict pipeline split into stages; returns [(stage, thunk)]."""
+    state = {}
+
+    def readfile():
+        state['doc'] = ezdxf.readfile(path)
+        state['msp'] = state['doc'].modelspace()
+
+    def rooms():
+        state['rooms'] = extract_rooms(state['msp'], scale, state['texts'])
+
+    def walls():
+        state['walls'] = pair_walls(state['segments'])
+
+    def openings():
+        match_openings(state['candidates'], state['walls'], state['rooms'])
+
+    return [
+        ('readfile', readfile),
+        ('extract_texts', lambda: state.update(texts=extract_texts(state['msp'], scale))),
+        ('extract_plinth', lambda: extract_plinth(state['msp'], scale)),
+        ('extract_rooms', rooms),
+        ('collect_wall_segments', lambda: state.update(segments=collect_wall_segments(state['msp'], scale))),
+        ('collect_openings', lambda: state.update(candidates=collect_openings(state['msp'], scale))),
+        ('pair_walls', walls),
+        ('map_walls_to_rooms', lambda: map_walls_to_rooms(state['walls'], state['rooms'])),
+        ('match_openings', openings),
+        ('analyze_strict', lambda: analyze_strict(state['doc'], scale)),
+    ]
+
+
+def measure(path, scale):
+    """Best-of-REPEATS wall clock per stage (after one warm-up run), then one
+    tracemalloc pass for peak memory."""
+    for _, fn in run_stages(path, scale):
+        fn()
+
+    # GC off while timing (as timeit does): collections triggered by earlier work are noise
+    timings = {}
+    for _ in range(REPEATS):
+        for stage, fn in run_stages(path, scale):
+            gc.collect()
+            gc.disable()
+            try:
+                t0 = time.perf_counter()
+                fn()
+                dt = time.perf_counter() - t0
+            finally:
+                gc.enable()
+            timings[stage] = min(dt, timings.get(stage, float('inf')))
+
+    memory = {}
+    tracemalloc.start()
+    try:
+        for stage, fn in run_stages(path, scale):
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            fn()
+            memory[stage] = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+    return {stage: {'seconds': round(timings[stage], 6), 'peak_bytes': memory[stage]} for stage in timings}
+
+
+def _median_of(samples):
+    return {
+        stage: {k: statistics.median(s[stage][k] for s in samples) for k in samples[0][stage]}
+        for stage in samples[0]
+    }
+
+
+def _best_of(a, b):
+    return {stage: {k: min(a[stage][k], b[stage][k]) for k in a[stage]} for stage in a}
+
+
+def compare(expected, actual, path="$"):
+    """Recursive diff with an absolute numeric tolerance. Returns a list of mismatch strings."""
+    if isinstance(expected, bool) or isinstance(actual, bool):
+        return [] if expected == actual else [f"{path}: expected {expected!r}, got {actual!r}"]
+
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        if abs(expected - actual) <= ABS_TOL:
+            return []
+        return [f"{path}: expected {expected}, got {actual}"]
+
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        diffs = []
+        for k in expected.keys() | actual.keys():
+            if k not in actual:
+                diffs.append(f"{path}.{k}: missing")
+            elif k not in expected:
+                diffs.append(f"{path}.{k}: unexpected")
+            else:
+                diffs.extend(compare(expected[k], actual[k], f"{path}.{k}"))
+        return diffs
+
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f"{path}: expected {len(expected)} items, got {len(actual)}"]
+        diffs = []
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            diffs.extend(compare(e, a, f"{path}[{i}]"))
+        return diffs
+
+    return [] if expected == actual else [f"{path}: expected {expected!r}, got {actual!r}"]
+
+
+def check_budget(budget, actual):
+    failures = []
+    for stage, b in budget.items():
+        a = actual.get(stage)
+        if a is None:
+            failures.append(f"{stage}: stage missing")
+            continue
+        floor = STAGE_TIME_FLOORS.get(stage, TIME_FLOOR)
+        if a['seconds'] > b['seconds'] * TIME_THRESHOLD + floor:
+            failures.append(f"{stage}: {a['seconds'] * 1000:.2f} ms vs budget {b['seconds'] * 1000:.2f} ms")
+        if a['peak_bytes'] > b['peak_bytes'] * MEM_THRESHOLD + MEM_FLOOR:
+            failures.append(f"{stage}: peak {a['peak_bytes'] // 1024} KiB vs budget {b['peak_bytes'] // 1024} KiB")
+    return failures
+
+
+# In-process path (< MIN_PARALLEL_POINTS points) and process-pool path (>= MIN_PARALLEL_POINTS)
+SWEEP_GRIDS = {
+    'in-process': {'EXTERNAL_WALL_THRESHOLD': [0.1, 0.2], 'OPENING_SEARCH_RADIUS': [0.05, 0.5]},
+    'process-pool': {
+        'EXTERNAL_WALL_THRESHOLD': [0.1, 0.2],
+        'OPENING_SEARCH_RADIUS': [0.05, 0.5],
+        'WALL_THICKNESS_MIN': [0.08, 0.15],
+        'WALL_THICKNESS_MAX': [0.2, 0.6],
+    },
+}
+
+
+def check_sweep(path, scale):
+    """Every sweep point must equal a plain analyze_strict run with that config."""
+    doc = ezdxf.readfile(path)
+    problems = []
+    for label, grid in SWEEP_GRIDS.items():
+        results = sweep_parameters(doc, scale, grid)
+        for r in results:
+            expected = analyze_strict(doc, scale, make_config(r['params']))
+            for key in ('boq', 'counts', 'opening_widths'):
+                problems.extend(compare(expected[key], r[key], f"sweep[{label}]{r['params']}.{key}"))
+    return problems
+
+
+# Default first; the rest hit the height, width-override, lintel and rate branches
+COST_SCENARIOS = [
+    {},
+    {'params': {'WALL_HEIGHT': 3.3}},
+    {'params': {'DOOR_WIDTH': 1.0, 'WINDOW_HEIGHT': 1.2}},
+    {'params': {'LINTEL_BEARING': 0.2, 'LINTEL_DEPTH': 0.2, 'VENTILATOR_WIDTH': 0.45}},
+    {'rates': {'masonry': 7000, 'plaster': 400}},
+    {'params': {'WALL_HEIGHT': 2.7}, 'rates': {'table': 'default', 'door': 6000}},
+]
+
+
+def check_costing(result):
+    """Costing all COST_SCENARIOS in one batch must give the same rows as one at a time."""
+    problems = []
+    quantities, costs = cost_arrays(result, COST_SCENARIOS)
+    for i, sc in enumerate(COST_SCENARIOS):
+        q, c = cost_arrays(result, [sc])
+        if not (np.allclose(quantities[i], q[0], rtol=0, atol=1e-9) and np.allclose(costs[i], c[0], rtol=0, atol=1e-6)):
+            problems.append(f"costing[{i}] {sc}: batch row differs from single-scenario result")
+    return problems
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--record', action='store_true', help="re-record goldens (budgets untouched)")
+    ap.add_argument('--record-budgets', action='store_true', help="re-record budgets for this machine (goldens untouched)")
+    ap.add_argument('--no-perf', action='store_true', help="skip wall-clock / memory budgets")
+    ap.add_argument('-k', dest='only', help="only run cases whose name contains this")
+    args = ap.parse_args(argv)
+
+    goldens = _read_json(GOLDEN_PATH)
+    cost_goldens = _read_json(COST_GOLDEN_PATH)
+    budgets = _read_json(BUDGET_PATH)
+    check_perf = not args.no_perf and not args.record
+    failed = False
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, (path, scale) in load_corpus(tmp_dir, args.only).items():
+            if args.record_budgets:
+                # Median, not best: a budget recorded in a lucky quiet moment would flake later
+                budgets[name] = _median_of([measure(path, scale) for _ in range(BUDGET_SAMPLES)])
+                print(f"budgeted  {name}")
+                continue
+
+            # JSON round-trip so Vec2 etc. compare the same way they are stored
+            result = json.loads(json.dumps(analyze_strict(ezdxf.readfile(path), scale), default=list))
+
+            costed = cost_scenarios(result, COST_SCENARIOS)
+
+            if args.record:
+                goldens[name] = result
+                cost_goldens[name] = costed
+                print(f"recorded  {name}")
+                continue
+
+            problems = []
+            if name not in goldens:
+                problems.append("no golden recorded (run with --record)")
+            else:
+                problems.extend(compare(goldens[name], result))
+            if name not in cost_goldens:
+                problems.append("no cost golden recorded (run with --record)")
+            else:
+                problems.extend(compare(cost_goldens[name], costed, "$costs"))
+
+            problems.extend(check_sweep(path, scale))
+            problems.extend(check_costing(result))
+
+            perf = None
+            if check_perf:
+                if name not in budgets:
+                    problems.append("no budget recorded for this machine (run with --record-budgets, or --no-perf)")
+                else:
+                    perf = measure(path, scale)
+                    budget_problems = check_budget(budgets[name], perf)
+                    # Timer noise only ever adds time: re-sample and keep the best per stage,
+                    # so a real regression fails every attempt and a noisy burst does not
+                    for _ in range(PERF_RETRIES):
+                        if not budget_problems:
+                            break
+                        perf = _best_of(perf, measure(path, scale))
+                        budget_problems = check_budget(budgets[name], perf)
+                    problems.extend(budget_problems)
+
+            if problems:
+                failed = True
+                print(f"FAIL      {name}")
+                for p in problems:
+                    print(f"    {p}")
+            else:
+                total = f" ({perf['analyze_strict']['seconds'] * 1000:.1f} ms)" if perf else ""
+                print(f"ok        {name}{total}")
+
+    if args.record:
+        _write_json(GOLDEN_PATH, goldens)
+        _write_json(COST_GOLDEN_PATH, cost_goldens)
+    if args.record_budgets:
+        _write_json(BUDGET_PATH, budgets)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,9 +4,13 @@ import ezdxf
 import uuid
 import os
 import logging
+import json
+from contextlib import contextmanager
 
 from analysis.config import CustomJSONProvider
 from analysis.main_analyzer import analyze_strict
+from analysis.sweep import sweep_parameters
+from analysis.costing import cost_scenarios, FORMULA_NOTES
 import ai_engine
 
 app = Flask(__name__)
@@ -16,43 +20,33 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("DXF_ENGINE")
 
-@app.route('/analyze-cad', methods=['POST'])
-def analyze_cad():
-    if 'file' not in request.files:
-        return jsonify({"error": "No file"}), 400
+UNIT_SCALES = {
+    'mm': 0.001,
+    'cm': 0.01,
+    'm': 1.0,
+    'ft': 0.3048
+}
+
 
+@contextmanager
+def saved_upload(with_image=False):
+    """Save the uploaded DXF (and optional image) to uploads/ and yield
+    (dxf_path, image_path, scale); the files are removed afterwards."""
     f = request.files['file']
-    img = request.files.get('image_file')
+    img = request.files.get('image_file') if with_image else None
     unit = request.form.get('unit', 'm')
-    scale = {
-        'mm': 0.001,
-        'cm': 0.01,
-        'm': 1.0,
-        'ft': 0.3048
-    }.get(unit.lower(), 1.0)
+    scale = UNIT_SCALES.get(unit.lower(), 1.0)
 
     sess_id = str(uuid.uuid4())
     d_path = f"uploads/{sess_id}.dxf"
     i_path = f"uploads/{sess_id}.jpg" if img else None
 
     os.makedirs("uploads", exist_ok=True)
-    f.save(d_path)
-    if img:
-        img.save(i_path)
-
     try:
-        doc = ezdxf.readfile(d_path)
-
-        cad_data = analyze_strict(doc, scale)
-
-        ai_result = ai_engine.generate_architectural_insight(cad_data, i_path)
-        cad_data['ai_analysis'] = ai_result
-
-        return jsonify(cad_data)
-
-    except Exception as e:
-        logger.error(e)
-        return jsonify({"error": str(e)}), 500
+        f.save(d_path)
+        if img:
+            img.save(i_path)
+        yield d_path, i_path, scale
 
     finally:
         if os.path.exists(d_path):
@@ -61,5 +55,69 @@ def analyze_cad():
             os.remove(i_path)
 
 
+@app.route('/analyze-cad', methods=['POST'])
+def analyze_cad():
+    if 'file' not in request.files:
+        return jsonify({"error": "No file"}), 400
+
+    with saved_upload(with_image=True) as (d_path, i_path, scale):
+        try:
+            doc = ezdxf.readfile(d_path)
+
+            cad_data = analyze_strict(doc, scale)
+
+            ai_result = ai_engine.generate_architectural_insight(cad_data, i_path)
+            cad_data['ai_analysis'] = ai_result
+
+            return jsonify(cad_data)
+
+        except Exception as e:
+            logger.error(e)
+            return jsonify({"error": str(e)}), 500
+
+
+@app.route('/analyze-cad/sweep', methods=['POST'])
+def analyze_cad_sweep():
+    if 'file' not in request.files:
+        return jsonify({"error": "No file"}), 400
+
+    try:
+        grid = json.loads(request.form.get('grid', ''))
+    except ValueError:
+        return jsonify({"error": "Invalid grid JSON"}), 400
+
+    with saved_upload() as (d_path, _, scale):
+        try:
+            doc = ezdxf.readfile(d_path)
+            results = sweep_parameters(doc, scale, grid)
+            return jsonify({"status": "success", "results": results})
+
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        except Exception as e:
+            logger.error(e)
+            return jsonify({"error": str(e)}), 500
+
+
+@app.route('/boq/cost', methods=['POST'])
+def boq_cost():
+    body = request.get_json(silent=True) or {}
+    if 'result' not in body:
+        return jsonify({"error": "No result"}), 400
+
+    scenarios = body.get('scenarios') or [{}]
+
+    try:
+        return jsonify({
+            "status": "success",
+            "scenarios": cost_scenarios(body['result'], scenarios),
+            "formula_notes": FORMULA_NOTES
+        })
+
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)